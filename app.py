@@ -1,9 +1,25 @@
+import io
 import os
 import re
+import json
+import mmap
+import time
+import shutil
+import hashlib
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from bisect import bisect_right
+from collections import Counter
+from contextlib import nullcontext
+from functools import lru_cache, partial
+from operator import itemgetter
+import numpy as np
 import pdfplumber
-from flask import Flask, request, jsonify, send_from_directory
+from pdfminer.pdftypes import resolve1
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
-from werkzeug.utils import secure_filename
+from werkzeug.exceptions import HTTPException
 try:
     from markitdown import MarkItDown
     MARKITDOWN_AVAILABLE = True
@@ -16,48 +32,116 @@ try:
 except ImportError:
     PYMUPDF_AVAILABLE = False
 
-try:
-    from marker.converters.pdf import PdfConverter
-    from marker.models import create_model_dict
-    from marker.output import text_from_rendered
-    from marker.config.parser import ConfigParser
-    MARKER_AVAILABLE = True
-    # Load models once at startup
-    print("Loading Marker models... (this may take a moment on first run)")
-    MARKER_MODELS = create_model_dict()
-
-    # Configure Marker to disable multiprocessing on Windows to avoid process pool crashes
-    config_dict = {"disable_multiprocessing": True}
-    config_parser = ConfigParser(config_dict)
-    MARKER_CONVERTER = PdfConverter(
-        artifact_dict=MARKER_MODELS,
-        config=config_parser.generate_config_dict()
-    )
-    print("✓ Marker models loaded successfully!")
-except ImportError as e:
-    print(f"✗ Marker not available: Import error - {e}")
-    MARKER_AVAILABLE = False
-    MARKER_MODELS = None
-    MARKER_CONVERTER = None
-except Exception as e:
-    print(f"✗ Marker models failed to load: {e}")
-    MARKER_AVAILABLE = False
-    MARKER_MODELS = None
-    MARKER_CONVERTER = None
+# Page-extraction worker processes are always started with the spawn method
+# (see WORKER_CONTEXT), so they re-import this module; they only run the
+# layout pipeline, so don't load the Marker models there.
+IS_WORKER_PROCESS = multiprocessing.parent_process() is not None
+
+# Forking the threaded Flask server could copy locks held by other request
+# threads (e.g. inside MuPDF or pdfminer) into a child, which then deadlocks
+# waiting on them, so workers start from a fresh interpreter instead
+WORKER_CONTEXT = multiprocessing.get_context('spawn')
+
+MARKER_AVAILABLE = False
+MARKER_MODELS = None
+MARKER_CONVERTER = None
+
+if not IS_WORKER_PROCESS:
+    try:
+        from marker.converters.pdf import PdfConverter
+        from marker.models import create_model_dict
+        from marker.output import text_from_rendered
+        from marker.config.parser import ConfigParser
+        MARKER_AVAILABLE = True
+        # Load models once at startup
+        print("Loading Marker models... (this may take a moment on first run)")
+        MARKER_MODELS = create_model_dict()
+
+        # Configure Marker to disable multiprocessing on Windows to avoid process pool crashes
+        config_dict = {"disable_multiprocessing": True}
+        config_parser = ConfigParser(config_dict)
+        MARKER_CONVERTER = PdfConverter(
+            artifact_dict=MARKER_MODELS,
+            config=config_parser.generate_config_dict()
+        )
+        print("✓ Marker models loaded successfully!")
+    except ImportError as e:
+        print(f"✗ Marker not available: Import error - {e}")
+        MARKER_AVAILABLE = False
+        MARKER_MODELS = None
+        MARKER_CONVERTER = None
+    except Exception as e:
+        print(f"✗ Marker models failed to load: {e}")
+        MARKER_AVAILABLE = False
+        MARKER_MODELS = None
+        MARKER_CONVERTER = None
 
 app = Flask(__name__, static_folder='frontend')
 CORS(app)
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
+CACHE_FOLDER = 'cache'  # Extracted page text, keyed by PDF content hash
+CACHE_VERSION = 2  # Bump when extracted text changes, so stale entries are never served
+CACHE_MAX_AGE = 7 * 24 * 60 * 60  # Seconds a cached document may go unused before eviction
+CACHE_MAX_SIZE = 500 * 1024 * 1024  # Least recently used documents are evicted beyond this
+CACHE_PRUNE_INTERVAL = 10 * 60  # Seconds between cache clean-ups in each process
 ALLOWED_EXTENSIONS = {'pdf'}
+INVALID_FILE_TYPE = 'Invalid file type. Only PDF files are allowed.'
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Copy size for raw PDF request bodies
+UPLOAD_SPOOL_SIZE = 500 * 1024  # Werkzeug keeps smaller multipart uploads in memory
+PDF_HEADER = b'%PDF-'  # Magic bytes every PDF starts with
+PDF_HEADER_SEARCH = 1024  # Readers accept the header anywhere in the first 1KB
+IN_MEMORY_UPLOAD_SIZE = 20 * 1024 * 1024  # Smaller uploads may skip the disk (see read_upload)
+STREAM_ERROR_MARKER = '\0ERROR: '  # Ends a streamed body that failed part way (see extract_pdf_stream)
+MIN_PARALLEL_PAGES = 4  # Smaller page ranges are extracted without worker processes
+MAX_FOOTER_LENGTH = 100  # Longer repeated lines are never treated as footers
+MAX_CACHED_LINE_LENGTH = 120  # Longer lines skip the line classification caches
+LINE_Y_TOLERANCE = 5  # Words whose tops are this close are on the same line
+MIN_GUTTER_WIDTH = 8  # Narrowest gap between columns, in PDF units
+MIN_COLUMN_LINES = 3  # Lines side by side needed to call a page two-column
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+app.config['CACHE_FOLDER'] = CACHE_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 
-# Create upload folder if it doesn't exist
+# Create upload and cache folders if they don't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(CACHE_FOLDER, exist_ok=True)
+
+# Pre-compiled patterns used on every page/line of the pdfplumber pipeline
+_RE_BR_TAG = re.compile(r'<br\s*/?>')
+_RE_HTML_TAG = re.compile(r'<[^>]+>')
+# Single-pass cleanup: each alternative is one of the former clean_text passes.
+# Lookarounds keep the neighbouring letters unconsumed so chained joins
+# (e.g. "multi-\ncol-\numn") are handled in the same scan. Tabs are turned
+# into spaces beforehand, so the whitespace alternative only has to match
+# runs of spaces that actually need collapsing.
+_RE_CLEAN = re.compile(
+    r'(?P<join>(?<=\w)-\s+(?=\w)'      # hyphenation: "Play- ing", "dun-\ngeon"
+    r'|(?<=[a-z])\s*\n\s*(?=[a-z]))'   # broken words across lines
+    r'|(?P<ws> {2,})'                   # runs of spaces
+    r'|(?P<nl>\n{3,})'                  # runs of blank lines
+)
+_CLEAN_REPLACEMENTS = {'join': '', 'ws': ' ', 'nl': '\n\n'}
+# ASCII digits only: [0-9] skips the Unicode digit lookup that \d does,
+# while \s still accepts the no-break and other spaces found in PDFs.
+# Lines numbered with other digits (Arabic-Indic "١.", full-width "１.")
+# are therefore not list items; they render as paragraphs or headings.
+_RE_NUMLIST = re.compile(r'[0-9]+[.)]\s+')
+_RE_PAGENUM = re.compile(r'^Page\s+\d+\s*$', re.IGNORECASE)
+
+# Bullet markers; a bullet is one of these followed by whitespace. Checked
+# with plain string operations, no regex needed.
+_BULLET_CHARS = '•●-*'
+
+# Bound method of the per-line pattern, saving an attribute lookup per call
+_match_numlist = _RE_NUMLIST.match
+
+# Positions of x0, x1, top and text in PyMuPDF word tuples, which are
+# (x0, y0, x1, y1, text, block_no, line_no, word_no)
+FITZ_WORD_KEYS = (0, 2, 1, 4)
 
 
 def allowed_file(filename):
@@ -65,69 +149,199 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def clean_text(text):
-    """Clean and normalize extracted text."""
-    # Remove HTML tags (especially <br> tags from Marker extraction)
-    text = re.sub(r'<br\s*/?>', ' ', text)  # Replace <br> and <br/> with space
-    text = re.sub(r'<[^>]+>', '', text)  # Remove any other HTML tags
+def hash_pdf(data):
+    """Return the cache key for a PDF: the MD5 hex digest of its bytes (or mmap)."""
+    return hashlib.md5(data).hexdigest()
 
-    # Remove excessive whitespace
-    text = re.sub(r'[ \t]+', ' ', text)
 
-    # Remove word breaks (hyphenation at line end) - handle both \n and space
-    # Examples: "Play- ing" -> "Playing", "dun-\ngeon" -> "dungeon"
-    text = re.sub(r'(\w)-\s*\n\s*(\w)', r'\1\2', text)  # With newline
-    text = re.sub(r'(\w)-\s+(\w)', r'\1\2', text)  # With spaces only
+def document_cache_dir(pdf_data):
+    """
+    Return the cache directory for a PDF's bytes (or mmap) and mark it used.
 
-    # Fix broken words across lines (e.g., "experi ence" -> "experience")
-    # Look for lowercase letter followed by newline/space and lowercase letter
-    text = re.sub(r'([a-z])\s*\n\s*([a-z])', r'\1\2', text)
+    Documents are cached under a directory for CACHE_VERSION, so text
+    extracted by an older version of the code is never served. Looking a
+    document up also gives prune_cache a chance to run.
+    """
+    cache_dir = os.path.join(app.config['CACHE_FOLDER'], f'v{CACHE_VERSION}', hash_pdf(pdf_data))
+    try:
+        # The directory's mtime records when the document was last used
+        os.utime(cache_dir)
+    except OSError:
+        pass  # Not cached yet
+    prune_cache()
+    return cache_dir
 
-    # Normalize multiple spaces
-    text = re.sub(r'  +', ' ', text)
 
-    # Normalize line breaks (but keep single line breaks)
-    text = re.sub(r'\n\n+', '\n\n', text)
+_last_cache_prune = 0.0
 
-    return text.strip()
+
+def prune_cache():
+    """
+    Evict cached documents unused for CACHE_MAX_AGE, then the least recently
+    used ones until the cache fits in CACHE_MAX_SIZE. Entries of other cache
+    versions are removed outright. Runs at most once per CACHE_PRUNE_INTERVAL.
+    """
+    global _last_cache_prune
+    now = time.time()
+    if now - _last_cache_prune < CACHE_PRUNE_INTERVAL:
+        return
+    _last_cache_prune = now
+
+    cache_root = app.config['CACHE_FOLDER']
+    version_name = f'v{CACHE_VERSION}'
+    documents = []
+    try:
+        for name in os.listdir(cache_root):
+            if name != version_name:
+                shutil.rmtree(os.path.join(cache_root, name), ignore_errors=True)
+
+        with os.scandir(os.path.join(cache_root, version_name)) as entries:
+            for entry in entries:
+                last_used = entry.stat().st_mtime
+                if now - last_used > CACHE_MAX_AGE:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    documents.append((last_used, directory_size(entry.path), entry.path))
+    except OSError:
+        return
+
+    total_size = sum(size for _, size, _ in documents)
+    for _, size, path in sorted(documents):
+        if total_size <= CACHE_MAX_SIZE:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total_size -= size
+
+
+def directory_size(path):
+    """Return the total size of the files under path, in bytes."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # Removed meanwhile
+    return total
+
+
+def load_cache_meta(cache_dir):
+    """Load the cached document metadata (e.g. total_pages), or None on a miss."""
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
 
-def detect_heading(line, next_line=None):
-    """Detect if a line is likely a heading."""
-    line = line.strip()
+def save_cache_meta(cache_dir, meta):
+    """Store document metadata in the cache."""
+    write_cached_text(cache_dir, 'meta.json', json.dumps(meta))
+
+
+def read_cached_text(cache_dir, name):
+    """Read a cached text entry, or return None on a miss."""
+    try:
+        with open(os.path.join(cache_dir, name), encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def write_cached_text(cache_dir, name, text):
+    """
+    Write a cache entry atomically so concurrent readers never see partial files.
+
+    Caching is best-effort: a failed write (e.g. prune_cache removed the
+    directory meanwhile) is logged and skipped rather than failing the
+    extraction that produced the text.
+    """
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Every writer gets its own temp file; request threads share a pid
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=f'{name}.', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, os.path.join(cache_dir, name))
+    except OSError as e:
+        print(f"Could not cache {name}: {e}")
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def _clean_replacement(match):
+    """Return the replacement for whichever _RE_CLEAN alternative matched."""
+    return _CLEAN_REPLACEMENTS[match.lastgroup]
+
+
+def clean_text(text):
+    """Clean and normalize extracted text."""
+    # Remove HTML tags (especially <br> tags from Marker extraction);
+    # plain extracted text usually has none, so skip both scans then
+    if '<' in text:
+        text = _RE_BR_TAG.sub(' ', text)  # Replace <br> and <br/> with space
+        text = _RE_HTML_TAG.sub('', text)  # Remove any other HTML tags
 
+    # Collapse whitespace, join hyphenated/broken words and normalize
+    # line breaks in a single scan over the text
+    text = _RE_CLEAN.sub(_clean_replacement, text.replace('\t', ' '))
+
+    return text.strip()
+
+
+@lru_cache(maxsize=8192)
+def _is_heading(line, before_blank):
+    """Heading test for a stripped line, given whether a blank line follows."""
     # Empty lines are not headings
     if not line:
         return False
 
-    # All caps lines (at least 3 chars) are likely headings
-    if len(line) >= 3 and line.isupper() and not line.endswith('.'):
+    last_char = line[-1]
+
+    # All caps lines (at least 3 chars) are likely headings. The O(1) checks
+    # go first so most body text never reaches isupper(), which itself stops
+    # at the first lowercase character.
+    if last_char != '.' and len(line) >= 3 and line.isupper():
         return True
 
     # Short lines (< 60 chars) followed by empty line might be headings
-    if len(line) < 60 and next_line is not None and not next_line.strip():
+    if len(line) < 60 and before_blank:
         # Check if it starts with capital and doesn't end with common punctuation
-        if line[0].isupper() and not line.endswith((',', ';', ':')):
+        if last_char not in ',;:' and line[0].isupper():
             return True
 
     return False
 
 
-def format_line_as_markdown(line, is_heading=False, heading_level=3):
-    """Format a line as markdown."""
-    line = line.strip()
+def detect_heading(line, next_line=None):
+    """
+    Detect if a line is likely a heading. Expects stripped lines.
+
+    Documents repeat the same short lines (section labels, running heads),
+    so results are memoized; long lines go straight to the uncached test.
+    """
+    before_blank = next_line is not None and not next_line
+    if len(line) > MAX_CACHED_LINE_LENGTH:
+        return _is_heading.__wrapped__(line, before_blank)
+    return _is_heading(line, before_blank)
+
 
+def format_line_as_markdown(line, is_heading=False, heading_level=3):
+    """Format a stripped line as markdown."""
     if not line:
         return ''
 
     # Detect and format bullet points
-    if re.match(r'^[•●\-\*]\s+', line):
+    if line[0] in _BULLET_CHARS and line[1:2].isspace():
         # Normalize bullet to markdown format
-        line = re.sub(r'^[•●\-\*]\s+', '- ', line)
-        return line
+        return '- ' + line[1:].lstrip()
 
     # Detect numbered lists
-    if re.match(r'^\d+[\.\)]\s+', line):
+    if _match_numlist(line):
         return line
 
     # Format as heading if detected
@@ -137,12 +351,180 @@ def format_line_as_markdown(line, is_heading=False, heading_level=3):
     return line
 
 
+def _near_any(tops, other_tops, tolerance):
+    """Return a mask of the tops lying within tolerance of any of other_tops."""
+    other_tops = np.sort(other_tops)
+    nearest = np.searchsorted(other_tops, tops - tolerance)
+    found = nearest < len(other_tops)
+    found[found] = other_tops[nearest[found]] <= tops[found] + tolerance
+    return found
+
+
+def find_column_gutter(x0, x1, tops, page_width):
+    """
+    Find the gutter between the columns of a two-column page.
+
+    A gutter is a strip in the middle half of the page, at least
+    MIN_GUTTER_WIDTH wide, that (almost) no word covers - a running head,
+    title or page number may cross it - with a column of lines starting
+    right after it, about as many as start at the left margin. Single-column
+    prose has words all over the page, so it has no such strip; to rule out
+    spaces that happen to line up on a short page, text must also sit on
+    both sides of the gutter in at least MIN_COLUMN_LINES rows.
+
+    Args:
+        x0: Array of word left edges
+        x1: Array of word right edges
+        tops: Array of word tops
+        page_width: Width of the page in PDF units
+
+    Returns:
+        (start, end) of the middle half of the gutter, which only words
+        bridging the columns overlap; None for a single column page
+    """
+    width = int(page_width)
+    middle_start, middle_end = int(page_width * 0.25), int(page_width * 0.75)
+    if middle_start == 0 or middle_end <= middle_start:
+        return None
+
+    # Lines starting at the left margin: the peak of the left edge counts,
+    # smoothed over a small window so margins that wobble a little still
+    # form one peak
+    window = 10
+    left_edges = np.bincount(np.clip(x0.astype(np.intp), 0, width), minlength=width + 1)
+    margin_lines = np.convolve(left_edges[:middle_start], np.ones(window), mode='same').max()
+
+    # How many words cover each point across the page
+    starts = np.clip(np.floor(x0).astype(np.intp), 0, width + 1)
+    ends = np.clip(np.ceil(x1).astype(np.intp), 0, width + 1)
+    coverage = np.cumsum(np.bincount(starts, minlength=width + 2) - np.bincount(ends, minlength=width + 2))
+
+    # Runs of (nearly) uncovered points wide enough to be a gutter
+    crossing = max(2, 0.2 * margin_lines)
+    is_open = np.concatenate(([False], coverage[middle_start:middle_end] <= crossing, [False]))
+    runs = middle_start + np.flatnonzero(np.diff(is_open.view(np.int8))).reshape(-1, 2)
+    runs = runs[runs[:, 1] - runs[:, 0] >= MIN_GUTTER_WIDTH]
+
+    for gutter_start, gutter_end in runs.tolist():
+        # The second column's lines start where the gutter ends
+        column_lines = left_edges[gutter_end:gutter_end + window].sum()
+        if column_lines < MIN_COLUMN_LINES or column_lines < 0.5 * margin_lines:
+            continue
+
+        # The run reaches into the ragged right edge of the first column;
+        # the gutter proper starts where its longest lines end, ignoring as
+        # many words as may bridge the gutter and end inside it. Only the
+        # stretch next to the second column is needed to split the columns.
+        gutter_start = max(gutter_start, gutter_end - 2 * MIN_GUTTER_WIDTH)
+        line_ends = np.sort(x1[(x1 > gutter_start) & (x1 < gutter_end)])
+        bridging = int(crossing)
+        if line_ends.size > bridging:
+            gutter_start = max(gutter_start, float(line_ends[-1 - bridging]))
+        quarter = (gutter_end - gutter_start) / 4
+        core_start, core_end = gutter_start + quarter, gutter_end - quarter
+
+        # Columns sit side by side: rows where the second column starts a
+        # line also have text ending left of the gutter, and nothing
+        # bridging it
+        column_starts = tops[(x0 >= gutter_end) & (x0 < gutter_end + window)]
+        side_by_side = (
+            _near_any(column_starts, tops[x1 <= gutter_start], LINE_Y_TOLERANCE)
+            & ~_near_any(column_starts, tops[(x0 < core_end) & (x1 > core_start)], LINE_Y_TOLERANCE)
+        )
+        if np.count_nonzero(side_by_side) >= MIN_COLUMN_LINES:
+            return core_start, core_end
+
+    return None
+
+
+def layout_words_to_text(words, page_width, keys=('x0', 'x1', 'top', 'text')):
+    """
+    Rebuild page text from positioned words, reading columns in order.
+
+    Args:
+        words: Sequence of words, e.g. pdfplumber word dicts
+        page_width: Width of the page in PDF units
+        keys: Keys or indices of each word's x0, x1, top and text
+            (see FITZ_WORD_KEYS for PyMuPDF word tuples)
+
+    Returns:
+        Text with one line per visual line, columns read left to right
+    """
+    # Pull the sort keys out of the words once, at C speed
+    x0_key, x1_key, top_key, text_key = keys
+    count = len(words)
+    x0 = np.fromiter(map(itemgetter(x0_key), words), dtype=float, count=count)
+    x1 = np.fromiter(map(itemgetter(x1_key), words), dtype=float, count=count)
+    tops = np.fromiter(map(itemgetter(top_key), words), dtype=float, count=count)
+    texts = list(map(itemgetter(text_key), words))
+
+    # Detect column boundaries FIRST
+    gutter = find_column_gutter(x0, x1, tops, page_width)
+
+    if gutter is not None:
+        # Two column layout: words starting right of the middle of the
+        # gutter belong to the second column, so a margin that wobbles a
+        # little doesn't matter. Lines with a word across the middle of the
+        # gutter (a running head, a title spanning both columns) stay whole
+        # in column 0.
+        core_start, core_end = gutter
+        columns = x0 >= (core_start + core_end) / 2
+        bridging = (x0 < core_end) & (x1 > core_start)
+        if bridging.any():
+            columns &= ~_near_any(tops, tops[bridging], LINE_Y_TOLERANCE)
+        columns = columns.view(np.int8)
+    else:
+        # Single column: every word is in column 0, nothing to search
+        columns = np.zeros(count, dtype=np.int8)
+
+    # Order words by column, then y-position, then x-position
+    order = np.lexsort((x0, tops, columns))
+    sorted_texts = list(map(texts.__getitem__, order.tolist()))
+    sorted_tops = tops[order]
+
+    # Group words into lines, never joining words across columns. A line
+    # takes every word within y_tolerance below its first word. Runs split
+    # wherever the column changes or the gap to the next word exceeds
+    # y_tolerance; a run no taller than y_tolerance is exactly one line.
+    y_tolerance = LINE_Y_TOLERANCE
+    breaks = np.flatnonzero(
+        (np.diff(sorted_tops) > y_tolerance) | (np.diff(columns[order]) != 0)
+    ) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [count]))
+    tall = (sorted_tops[ends - 1] - sorted_tops[starts] > y_tolerance).tolist()
+    sorted_tops = sorted_tops.tolist()
+
+    result_lines = []
+    for start, end, is_tall in zip(starts.tolist(), ends.tolist(), tall):
+        if not is_tall:
+            result_lines.append(' '.join(sorted_texts[start:end]))
+            continue
+        # Tops drift down by small steps: bisect the run into lines
+        while start < end:
+            line_end = bisect_right(sorted_tops, sorted_tops[start] + y_tolerance, start, end)
+            result_lines.append(' '.join(sorted_texts[start:line_end]))
+            start = line_end
+
+    return '\n'.join(result_lines)
+
+
 def extract_text_with_layout(page):
     """
     Extract text from a page with better layout awareness.
     Handles multi-column layouts by detecting columns and reading them in order.
     """
     try:
+        # Cheap probe first: page.chars is parsed once and reused by extract_words.
+        # Image-only pages (e.g. scans) have no text layer at all, and pages with
+        # only a handful of characters don't need column detection.
+        chars = page.chars
+        if not chars:
+            return ''
+        min_layout_chars = 20
+        if len(chars) < min_layout_chars:
+            return page.extract_text() or ''
+
         # Extract words with their positions
         words = page.extract_words(x_tolerance=3, y_tolerance=3, keep_blank_chars=False)
 
@@ -150,98 +532,7 @@ def extract_text_with_layout(page):
             # Fallback to basic extraction
             return page.extract_text()
 
-        # Get page dimensions
-        page_width = page.width
-        page_height = page.height
-
-        # Detect column boundaries FIRST by analyzing x-coordinate distribution
-        # Find the largest horizontal gap that could separate columns
-        all_x_positions = sorted(set([int(w['x0']) for w in words] + [int(w['x1']) for w in words]))
-
-        # Find gaps between consecutive x-positions
-        gaps = []
-        for i in range(len(all_x_positions) - 1):
-            gap_size = all_x_positions[i + 1] - all_x_positions[i]
-            if gap_size > 40:  # Significant gap
-                gap_center = (all_x_positions[i] + all_x_positions[i + 1]) / 2
-                # Only consider gaps in the middle region of the page
-                if page_width * 0.25 < gap_center < page_width * 0.75:
-                    gaps.append((gap_size, gap_center))
-
-        # Determine column boundaries
-        if gaps:
-            # Sort by gap size and take the largest
-            gaps.sort(reverse=True)
-            column_gap = gaps[0][1]  # Take the center of the largest gap
-
-            # Two column layout
-            column_boundaries = [
-                (0, column_gap, 0),  # Left column
-                (column_gap, page_width, 1)  # Right column
-            ]
-        else:
-            # Single column
-            column_boundaries = [(0, page_width, 0)]
-
-        # Assign each word to a column based on its x-position
-        for word in words:
-            word_center_x = (word['x0'] + word['x1']) / 2
-
-            assigned = False
-            for min_x, max_x, col_idx in column_boundaries:
-                if min_x <= word_center_x <= max_x:
-                    word['column'] = col_idx
-                    assigned = True
-                    break
-
-            if not assigned:
-                # Fallback: assign to nearest column
-                distances = [(abs(word_center_x - (min_x + max_x) / 2), col_idx) for min_x, max_x, col_idx in column_boundaries]
-                word['column'] = min(distances)[1]
-
-        # Process each column separately
-        result_lines = []
-
-        for col_idx in range(len(column_boundaries)):
-            # Get all words in this column
-            column_words = [w for w in words if w.get('column') == col_idx]
-
-            if not column_words:
-                continue
-
-            # Sort words in this column by y-position, then x-position
-            column_words.sort(key=lambda w: (w['top'], w['x0']))
-
-            # Group words into lines within this column
-            lines_in_column = []
-            current_line_words = []
-            last_top = None
-            y_tolerance = 5  # Tolerance for considering words on the same line
-
-            for word in column_words:
-                if last_top is None or abs(word['top'] - last_top) <= y_tolerance:
-                    # Same line
-                    current_line_words.append(word)
-                    if last_top is None:
-                        last_top = word['top']
-                else:
-                    # New line
-                    if current_line_words:
-                        line_text = ' '.join([w['text'] for w in current_line_words])
-                        lines_in_column.append((current_line_words[0]['top'], line_text))
-                    current_line_words = [word]
-                    last_top = word['top']
-
-            # Add last line
-            if current_line_words:
-                line_text = ' '.join([w['text'] for w in current_line_words])
-                lines_in_column.append((current_line_words[0]['top'], line_text))
-
-            # Sort lines by y-position and add to result
-            lines_in_column.sort(key=lambda x: x[0])
-            result_lines.extend([line_text for _, line_text in lines_in_column])
-
-        return '\n'.join(result_lines)
+        return layout_words_to_text(words, page.width)
 
     except Exception as e:
         # Fallback to layout-preserving extraction
@@ -256,23 +547,94 @@ def extract_text_with_layout(page):
         return page.extract_text() or ""
 
 
-def is_list_item(line):
-    """Check if a line is a list item."""
-    line = line.strip()
+def extract_text_with_layout_fitz(page, textpage=None):
+    """
+    Extract text from a PyMuPDF page with the same column handling as
+    extract_text_with_layout, using MuPDF's C word extraction instead of pdfminer.
+
+    textpage is an optional parse of the page (see page_textpage) to read
+    from instead of parsing the page again.
+    """
+    try:
+        # The word tuples go to the layout code as they are, no conversion
+        words = page.get_text("words", textpage=textpage)
+
+        if not words:
+            return page.get_text("text", textpage=textpage)
+
+        return layout_words_to_text(words, page.rect.width, keys=FITZ_WORD_KEYS)
+
+    except Exception as e:
+        return page.get_text("text", textpage=textpage) or ""
+
+
+def page_textpage(page):
+    """
+    Parse a PyMuPDF page once for several get_text calls.
+
+    Without a textpage, every get_text call parses the page again. Words and
+    plain text use the same flags, so one parse serves both.
+    """
+    return page.get_textpage(flags=fitz.TEXTFLAGS_TEXT)
+
+
+def extract_page_text(page, textpage=None):
+    """Extract layout-aware text from a PyMuPDF or pdfplumber page."""
+    if PYMUPDF_AVAILABLE and isinstance(page, fitz.Page):
+        return extract_text_with_layout_fitz(page, textpage)
+    return extract_text_with_layout(page)
+
+
+def extract_plain_text(page, textpage=None):
+    """Extract plain text (no column handling) from a PyMuPDF or pdfplumber page."""
+    if PYMUPDF_AVAILABLE and isinstance(page, fitz.Page):
+        # MuPDF ends every line with a newline; drop the final one to match
+        # pdfplumber so the last lines of the page line up
+        return page.get_text("text", textpage=textpage).rstrip('\n')
+    return page.extract_text()
+
+
+def extract_footer_lines(page, textpage=None):
+    """
+    Return a page's header/footer candidates: the non-empty lines among the
+    last three of its plain text, newline-joined. Lines too long to be
+    footers (see MAX_FOOTER_LENGTH) are left out here, before any counting.
+
+    Footers are taken from the plain text because in the layout text a
+    full-width footer ends up inside the left column.
+    """
+    plain_text = extract_plain_text(page, textpage)
+    if not plain_text:
+        return ''
+    # Only the tail is needed; don't split the whole page
+    lines = (line.strip() for line in plain_text.rsplit('\n', 3)[-3:])
+    return '\n'.join(line for line in lines if line and len(line) < MAX_FOOTER_LENGTH)
+
+
+@lru_cache(maxsize=8192)
+def _is_list_item(line):
+    """List item test for a stripped line."""
     if not line:
         return False
 
     # Check for bullet points
-    if re.match(r'^[•●\-\*]\s+', line):
+    if line[0] in _BULLET_CHARS and line[1:2].isspace():
         return True
 
     # Check for numbered lists
-    if re.match(r'^\d+[\.\)]\s+', line):
+    if _match_numlist(line):
         return True
 
     return False
 
 
+def is_list_item(line):
+    """Check if a stripped line is a list item (memoized like detect_heading)."""
+    if len(line) > MAX_CACHED_LINE_LENGTH:
+        return _is_list_item.__wrapped__(line)
+    return _is_list_item(line)
+
+
 def extract_with_markitdown(pdf_path):
     """
     Extract text from PDF using MarkItDown library.
@@ -292,7 +654,7 @@ def extract_with_markitdown(pdf_path):
     return result.text_content
 
 
-def extract_with_marker(pdf_path, start_page, end_page):
+def extract_with_marker(pdf_path, start_page, end_page, cache_dir=None):
     """
     Extract text from PDF using Marker library.
     Marker uses computer vision and ML for superior layout detection,
@@ -302,6 +664,7 @@ def extract_with_marker(pdf_path, start_page, end_page):
         pdf_path: Path to the PDF file
         start_page: Starting page number (1-indexed)
         end_page: Ending page number (1-indexed)
+        cache_dir: Optional per-document cache directory (see document_cache_dir)
 
     Returns:
         Markdown formatted text
@@ -309,6 +672,13 @@ def extract_with_marker(pdf_path, start_page, end_page):
     if not MARKER_AVAILABLE or not MARKER_CONVERTER:
         raise ImportError("Marker library not available")
 
+    # Model inference dominates, so reuse the result for a repeated range
+    cache_name = f"pages_{start_page}-{end_page}.md"
+    if cache_dir:
+        cached = read_cached_text(cache_dir, cache_name)
+        if cached is not None:
+            return cached
+
     # Convert from 1-indexed to 0-indexed for Marker
     # Marker uses page_range in format "start-end" (0-indexed)
     marker_start = start_page - 1
@@ -330,6 +700,9 @@ def extract_with_marker(pdf_path, start_page, end_page):
     rendered = converter(pdf_path)
     full_text, _, images = text_from_rendered(rendered)
 
+    if cache_dir:
+        write_cached_text(cache_dir, cache_name, full_text)
+
     return full_text
 
 
@@ -350,7 +723,8 @@ def extract_with_pymupdf(pdf_path, start_page, end_page):
         raise ImportError("PyMuPDF library not available")
 
     doc = fitz.open(pdf_path)
-    markdown_content = []
+    buf = io.StringIO()
+    write = buf.write
 
     try:
         for page_num in range(start_page - 1, end_page):
@@ -363,7 +737,9 @@ def extract_with_pymupdf(pdf_path, start_page, end_page):
             # This handles multi-column layouts automatically
             blocks = page.get_text("blocks")
 
-            markdown_content.append(f"## Page {page_num + 1}\n\n")
+            write('## Page ')
+            write(str(page_num + 1))
+            write('\n\n')
 
             for block in blocks:
                 # block is a tuple: (x0, y0, x1, y1, text, block_no, block_type)
@@ -371,47 +747,407 @@ def extract_with_pymupdf(pdf_path, start_page, end_page):
                     text = block[4].strip()
                     if text:
                         # Add text with proper spacing
-                        markdown_content.append(text + '\n\n')
+                        write(text)
+                        write('\n\n')
 
-            markdown_content.append('\n---\n\n')
+            write('\n---\n\n')
 
-        return ''.join(markdown_content)
+        return buf.getvalue()
 
     finally:
         doc.close()
 
 
-def extract_text_to_markdown(pdf_path, start_page, end_page, options=None):
+def use_pymupdf_layout(options):
+    """Whether the layout pipeline should read pages through PyMuPDF."""
+    return PYMUPDF_AVAILABLE and not options.get('use_pdfplumber', False)
+
+
+def open_layout_pdf(pdf_path, options, stream=None):
     """
-    Extract text from PDF and convert to markdown format.
+    Open a PDF for the layout pipeline.
+
+    PyMuPDF is used when available since its C parser is much faster than
+    pdfminer; pdfplumber remains available via the 'use_pdfplumber' option
+    (e.g. for table-heavy PDFs where it does better).
+
+    pdfplumber reads from `stream` (e.g. a memory-mapped upload) when given;
+    PyMuPDF reads the file itself from C, or parses `stream` from memory
+    when the upload was never saved (pdf_path is None).
+    """
+    if use_pymupdf_layout(options):
+        if pdf_path is None:
+            return fitz.open(stream=stream, filetype='pdf')
+        return fitz.open(pdf_path)
+    return pdfplumber.open(stream if stream is not None else pdf_path)
+
+
+def page_count(pdf):
+    """
+    Return the page count of a document from open_layout_pdf.
+
+    pdfplumber's pdf.pages builds every page object up front; the /Count
+    entry at the root of the page tree gives the same number directly.
+    """
+    if PYMUPDF_AVAILABLE and isinstance(pdf, fitz.Document):
+        return pdf.page_count
+    try:
+        return int(resolve1(resolve1(pdf.doc.catalog['Pages'])['Count']))
+    except Exception:
+        # Broken page tree: count the pages pdfplumber actually finds
+        return len(pdf.pages)
+
+
+def count_pages(pdf_path):
+    """Return the page count of a PDF file without parsing its pages."""
+    if PYMUPDF_AVAILABLE:
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+    with pdfplumber.open(pdf_path) as pdf:
+        return page_count(pdf)
+
+
+def get_pages(pdf):
+    """Return an indexable sequence of pages for a document from open_layout_pdf."""
+    if PYMUPDF_AVAILABLE and isinstance(pdf, fitz.Document):
+        return pdf
+    return pdf.pages
+
+
+def load_page(pages, page_num):
+    """
+    Return pages[page_num] (0-indexed), reporting a page missing from the
+    document as an invalid page range.
+
+    page_count, like PyMuPDF, trusts the page tree's /Count, which a damaged
+    PDF can overstate; a page that isn't there only shows up when loaded.
+    """
+    try:
+        return pages[page_num]
+    except IndexError:
+        raise ValueError(f"Invalid page range. PDF has no page {page_num + 1}.")
+
+
+def cached_page_text(page, name, extract, cache_dir=None):
+    """Return extract(page), served from and stored to cache_dir when given."""
+    if cache_dir:
+        text = read_cached_text(cache_dir, name)
+        if text is not None:
+            return text
+
+    text = extract(page) or ''
+    if cache_dir:
+        write_cached_text(cache_dir, name, text)
+    return text
+
+
+def extract_page_content(page, page_num, collect_footers=True, cache_dir=None):
+    """
+    Extract everything the markdown pipeline needs from a page in one visit.
+
+    Args:
+        page: PyMuPDF or pdfplumber page object
+        page_num: Page number (0-indexed)
+        collect_footers: Also collect header/footer candidates
+        cache_dir: Optional directory caching the page's extracted text
+
+    Returns:
+        Tuple of (layout text, list of footer candidate lines)
+    """
+    textpage = None
+
+    def extract(page, extract_text):
+        # Parse a PyMuPDF page on the first cache miss only, and share that
+        # parse between the layout text and the footer lines
+        nonlocal textpage
+        if textpage is None and PYMUPDF_AVAILABLE and isinstance(page, fitz.Page):
+            textpage = page_textpage(page)
+        return extract_text(page, textpage)
+
+    text = cached_page_text(page, f"page_{page_num + 1}.txt",
+                            partial(extract, extract_text=extract_page_text), cache_dir)
+
+    footer_candidates = []
+    if collect_footers:
+        # The page is already parsed at this point (pdfplumber keeps its
+        # chars, PyMuPDF the textpage), so this is cheap; only the candidate
+        # lines are kept (and cached), not the whole plain text
+        footer_text = cached_page_text(page, f"footers_{page_num + 1}.txt",
+                                       partial(extract, extract_text=extract_footer_lines), cache_dir)
+        if footer_text:
+            footer_candidates = footer_text.split('\n')
+
+    # Every extraction of this page reused one parse (page.chars is parsed
+    # once and shared). Now the page is done, so drop pdfplumber's cached
+    # layout; otherwise it stays alive until the document closes and memory
+    # grows with the page count.
+    if not (PYMUPDF_AVAILABLE and isinstance(page, fitz.Page)):
+        page.flush_cache()
+        page.get_textmap.cache_clear()
+
+    return text, footer_candidates
+
+
+def render_lines(lines, buf, common_footers=frozenset(), filter_headers_footers=True, preserve_formatting=True):
+    """
+    Format cleaned text lines as markdown paragraphs, lists and headings.
+
+    Args:
+        lines: Lines of cleaned page text, already stripped
+        buf: Text buffer the markdown is written to
+        common_footers: Set of header/footer lines to drop
+        filter_headers_footers: Drop footers and "Page N" lines
+        preserve_formatting: Detect headings
+    """
+    # This loop runs for every line of every page; bind the callables it
+    # uses to locals so each call skips the global/attribute lookups.
+    # Text and its trailing newlines go out as separate writes rather than
+    # building a concatenated copy of every line first.
+    write = buf.write
+    match_page_number = _RE_PAGENUM.match
+    check_heading = detect_heading
+    check_list_item = is_list_item
+    format_line = format_line_as_markdown
+
+    # Settle the footer switch once per page; the set lookup is skipped
+    # outright when no repeated footers were found
+    skip_footers = filter_headers_footers and bool(common_footers)
+
+    # Process lines with better list handling
+    paragraph_buffer = []
+    in_list = False
+    list_buffer = []
+
+    for line, next_line in zip(lines, lines[1:] + [None]):
+
+        # Skip common footers/headers
+        if skip_footers and line in common_footers:
+            continue
+
+        # Skip page numbers at top/bottom; only lines starting with "page"
+        # are worth running the regex on
+        if filter_headers_footers and line[:4].lower() == 'page' and match_page_number(line):
+            continue
+
+        if not line:
+            # Empty line - flush buffers
+            if in_list and list_buffer:
+                # Flush list
+                for list_item in list_buffer:
+                    write(list_item)
+                    write('\n')
+                write('\n')
+                list_buffer = []
+                in_list = False
+            elif paragraph_buffer:
+                # Flush paragraph
+                write(' '.join(paragraph_buffer))
+                write('\n\n')
+                paragraph_buffer = []
+            continue
+
+        # Check if this is a heading
+        is_heading_line = check_heading(line, next_line) if preserve_formatting else False
+
+        if is_heading_line:
+            # Flush any existing buffers
+            if in_list and list_buffer:
+                for list_item in list_buffer:
+                    write(list_item)
+                    write('\n')
+                write('\n')
+                list_buffer = []
+                in_list = False
+            if paragraph_buffer:
+                write(' '.join(paragraph_buffer))
+                write('\n\n')
+                paragraph_buffer = []
+
+            formatted_line = format_line(line, is_heading=True)
+            write(formatted_line)
+            write('\n\n')
+            continue
+
+        # Check if this is a list item
+        if check_list_item(line):
+            # Flush paragraph buffer if we're starting a list
+            if paragraph_buffer:
+                write(' '.join(paragraph_buffer))
+                write('\n\n')
+                paragraph_buffer = []
+
+            in_list = True
+            formatted_line = format_line(line)
+            list_buffer.append(formatted_line)
+        elif in_list:
+            # Check if this is a continuation of the previous list item
+            # (indented or doesn't start with list marker)
+            if list_buffer and not is_heading_line:
+                # Append to the last list item
+                list_buffer[-1] += ' ' + line
+            else:
+                # End of list, flush it
+                for list_item in list_buffer:
+                    write(list_item)
+                    write('\n')
+                write('\n')
+                list_buffer = []
+                in_list = False
+                # Process this line as regular text
+                paragraph_buffer.append(line)
+        else:
+            # Regular text - add to paragraph buffer
+            paragraph_buffer.append(line)
+
+    # Flush remaining buffers
+    if in_list and list_buffer:
+        for list_item in list_buffer:
+            write(list_item)
+            write('\n')
+        write('\n')
+    if paragraph_buffer:
+        write(' '.join(paragraph_buffer))
+        write('\n\n')
+
+
+def render_page_markdown(text, page_num, options, common_footers):
+    """
+    Format a page's extracted text as markdown.
+
+    Args:
+        text: Layout text from extract_page_content
+        page_num: Page number (0-indexed)
+        options: Dictionary of formatting options
+        common_footers: Set of header/footer lines to drop (see render_lines)
+
+    Returns:
+        Markdown for the page, or None if the page has no text
+    """
+    include_page_numbers = options.get('include_page_numbers', True)
+    filter_headers_footers = options.get('filter_headers_footers', True)
+    preserve_formatting = options.get('preserve_formatting', True)
+
+    if not text:
+        return None
+
+    buf = io.StringIO()
+
+    # Add page header if requested
+    if include_page_numbers:
+        buf.write('## Page ')
+        buf.write(str(page_num + 1))
+        buf.write('\n\n')
+
+    # Clean text and strip every line once up front
+    text = clean_text(text)
+    lines = [line.strip() for line in text.split('\n')]
+
+    render_lines(lines, buf, common_footers, filter_headers_footers, preserve_formatting)
+
+    return buf.getvalue()
+
+
+def _extract_pages(pdf_path, page_nums, options, collect_footers=True, cache_dir=None):
+    """
+    Worker entry point: extract a batch of pages from a PDF path.
+
+    Each worker process opens the PDF once for its whole batch.
+
+    Returns:
+        List of (page_num, layout text, footer candidates) tuples
+    """
+    with open_layout_pdf(pdf_path, options) as pdf:
+        pages = get_pages(pdf)
+        return [
+            (page_num, *extract_page_content(load_page(pages, page_num), page_num, collect_footers, cache_dir))
+            for page_num in page_nums
+        ]
+
+
+def extraction_workers(options, page_total):
+    """
+    Return how many worker processes should extract page_total pages.
+
+    The 'workers' option caps the process count (0 means one per CPU, 1
+    forces serial extraction). Short ranges stay serial since starting
+    processes would cost more than it saves. So does PyMuPDF by default:
+    at a few milliseconds per page, spawning workers and pickling their
+    results costs more than the pages themselves, so only an explicit
+    'workers' count parallelizes it.
+    """
+    workers = options.get('workers')
+    if page_total < MIN_PARALLEL_PAGES or (not workers and use_pymupdf_layout(options)):
+        return 1
+    cpu_count = os.cpu_count() or 1
+    return min(workers or cpu_count, cpu_count, page_total)
+
+
+def _iter_extracted_pages(pdf_path, pdf, page_nums, options, collect_footers, cache_dir):
+    """
+    Yield (page_num, layout text, footer candidates) for each page, in page order.
+
+    Pages are independent, so they are spread over worker processes (see
+    extraction_workers). Workers get small contiguous batches, which keeps
+    results flowing back in page order. They open the PDF themselves, so a
+    document held only in memory (pdf_path is None) is extracted serially.
+    """
+    workers = extraction_workers(options, len(page_nums)) if pdf_path else 1
+
+    if workers <= 1:
+        pages = get_pages(pdf)
+        for page_num in page_nums:
+            yield (page_num, *extract_page_content(load_page(pages, page_num), page_num, collect_footers, cache_dir))
+        return
+
+    batch_size = -(-len(page_nums) // (workers * 4))
+    batches = [page_nums[i:i + batch_size] for i in range(0, len(page_nums), batch_size)]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=WORKER_CONTEXT) as executor:
+        results = executor.map(
+            partial(_extract_pages, pdf_path, options=options,
+                    collect_footers=collect_footers, cache_dir=cache_dir),
+            batches
+        )
+        for batch in results:
+            yield from batch
+
+
+def iter_markdown_pages(pdf_path, start_page, end_page, options=None, cache_dir=None, pdf=None, total_pages=None):
+    """
+    Extract text from PDF and yield it as markdown, page by page.
 
     Args:
         pdf_path: Path to the PDF file
         start_page: Starting page number (1-indexed)
         end_page: Ending page number (1-indexed)
         options: Dictionary of formatting options
-
-    Returns:
-        Markdown formatted text
+        cache_dir: Optional per-document cache directory (see document_cache_dir)
+        pdf: Optional document already opened with open_layout_pdf(pdf_path, options);
+            reused instead of parsing the file again
+        total_pages: Optional page count of the document, when already known
+
+    Yields:
+        Markdown fragments; Marker, PyMuPDF and MarkItDown results arrive as
+        a single fragment
     """
     if options is None:
         options = {}
 
-    use_marker = options.get('use_marker', True)
+    use_marker = options.get('use_marker', False)
     use_pymupdf = options.get('use_pymupdf', False)
     use_markitdown = options.get('use_markitdown', False)
-    include_page_numbers = options.get('include_page_numbers', True)
     include_page_breaks = options.get('include_page_breaks', True)
     filter_headers_footers = options.get('filter_headers_footers', True)
-    preserve_formatting = options.get('preserve_formatting', True)
 
-    # Try Marker first - it has the best column detection using CV/ML
+    # Marker only runs when requested - it has the best column detection
+    # using CV/ML, but is far slower than the PyMuPDF layout pipeline below
     if use_marker and MARKER_AVAILABLE:
         try:
             print("Attempting extraction with Marker...")
-            result = extract_with_marker(pdf_path, start_page, end_page)
+            marker_cache_dir = os.path.join(cache_dir, 'marker') if cache_dir else None
+            result = extract_with_marker(pdf_path, start_page, end_page, marker_cache_dir)
             print("Marker extraction successful!")
-            return result
+            yield result
+            return
         except Exception as e:
             # Fall back to other methods if Marker fails
             print(f"Marker failed with error: {e}")
@@ -424,7 +1160,8 @@ def extract_text_to_markdown(pdf_path, start_page, end_page, options=None):
             print("Attempting extraction with PyMuPDF...")
             result = extract_with_pymupdf(pdf_path, start_page, end_page)
             print("PyMuPDF extraction successful!")
-            return result
+            yield result
+            return
         except Exception as e:
             # Fall back to other methods if PyMuPDF fails
             print(f"PyMuPDF failed with error: {e}")
@@ -439,163 +1176,86 @@ def extract_text_to_markdown(pdf_path, start_page, end_page, options=None):
             # For now, return full document - MarkItDown doesn't support page ranges natively
             # TODO: Implement page range filtering for MarkItDown output
             if start_page == 1:
-                with pdfplumber.open(pdf_path) as pdf:
-                    total_pages = len(pdf.pages)
-                    if end_page >= total_pages:
-                        return full_text
+                if total_pages is None:
+                    total_pages = page_count(pdf) if pdf is not None else count_pages(pdf_path)
+                if end_page >= total_pages:
+                    yield full_text
+                    return
 
             # Fall through to pdfplumber for page range extraction
         except Exception as e:
             # Fall back to pdfplumber if MarkItDown fails
             print(f"MarkItDown failed with error: {e}")
 
-    print("Falling back to pdfplumber extraction...")
-    markdown_content = []
-    common_footers = set()  # Track repeated text that might be footers
+    if use_pymupdf_layout(options):
+        print("Falling back to layout extraction with PyMuPDF...")
+        backend = 'pymupdf'
+    else:
+        print("Falling back to pdfplumber extraction...")
+        backend = 'pdfplumber'
+
+    # Extracted text differs between backends, so cache them separately
+    page_cache_dir = os.path.join(cache_dir, backend) if cache_dir else None
+    common_footers = frozenset()  # Track repeated text that might be footers
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            total_pages = len(pdf.pages)
+        with nullcontext(pdf) if pdf is not None else open_layout_pdf(pdf_path, options) as pdf:
+            if total_pages is None:
+                total_pages = page_count(pdf)
 
             # Validate page range
             if start_page < 1 or end_page > total_pages or start_page > end_page:
                 raise ValueError(f"Invalid page range. PDF has {total_pages} pages.")
 
-            # First pass: collect potential headers/footers
+            # Single extraction pass over the pages
+            extracted = _iter_extracted_pages(pdf_path, pdf, range(start_page - 1, end_page), options,
+                                              filter_headers_footers, page_cache_dir)
+
+            # Find lines that appear at the bottom of several pages (likely
+            # footers). This needs every page first; without footer filtering
+            # pages are formatted as soon as they are extracted.
             if filter_headers_footers:
-                page_last_lines = []
-                for page_num in range(start_page - 1, end_page):
-                    text = pdf.pages[page_num].extract_text()
-                    if text:
-                        lines = text.split('\n')
-                        if lines:
-                            # Check last few lines for common footers
-                            page_last_lines.extend([l.strip() for l in lines[-3:] if l.strip()])
-
-                # Find lines that appear multiple times (likely footers)
-                from collections import Counter
-                line_counts = Counter(page_last_lines)
-                common_footers = {line for line, count in line_counts.items() if count > 2 and len(line) < 100}
-
-            # Second pass: extract and format text
-            for page_num in range(start_page - 1, end_page):
-                page = pdf.pages[page_num]
-                text = extract_text_with_layout(page)
-
-                if text:
-                    # Add page header if requested
-                    if include_page_numbers:
-                        markdown_content.append(f"## Page {page_num + 1}\n\n")
-
-                    # Clean text
-                    text = clean_text(text)
-                    lines = text.split('\n')
-
-                    # Process lines with better list handling
-                    i = 0
-                    paragraph_buffer = []
-                    in_list = False
-                    list_buffer = []
-
-                    while i < len(lines):
-                        line = lines[i].strip()
-                        next_line = lines[i + 1].strip() if i + 1 < len(lines) else None
-
-                        # Skip common footers/headers
-                        if filter_headers_footers and line in common_footers:
-                            i += 1
-                            continue
-
-                        # Skip page numbers at top/bottom
-                        if filter_headers_footers and re.match(r'^Page\s+\d+\s*$', line, re.IGNORECASE):
-                            i += 1
-                            continue
-
-                        if not line:
-                            # Empty line - flush buffers
-                            if in_list and list_buffer:
-                                # Flush list
-                                for list_item in list_buffer:
-                                    markdown_content.append(list_item + '\n')
-                                markdown_content.append('\n')
-                                list_buffer = []
-                                in_list = False
-                            elif paragraph_buffer:
-                                # Flush paragraph
-                                markdown_content.append(' '.join(paragraph_buffer) + '\n\n')
-                                paragraph_buffer = []
-                            i += 1
-                            continue
-
-                        # Check if this is a heading
-                        is_heading_line = detect_heading(line, next_line) if preserve_formatting else False
-
-                        if is_heading_line:
-                            # Flush any existing buffers
-                            if in_list and list_buffer:
-                                for list_item in list_buffer:
-                                    markdown_content.append(list_item + '\n')
-                                markdown_content.append('\n')
-                                list_buffer = []
-                                in_list = False
-                            if paragraph_buffer:
-                                markdown_content.append(' '.join(paragraph_buffer) + '\n\n')
-                                paragraph_buffer = []
-
-                            formatted_line = format_line_as_markdown(line, is_heading=True)
-                            markdown_content.append(formatted_line + '\n\n')
-                            i += 1
-                            continue
-
-                        # Check if this is a list item
-                        if is_list_item(line):
-                            # Flush paragraph buffer if we're starting a list
-                            if paragraph_buffer:
-                                markdown_content.append(' '.join(paragraph_buffer) + '\n\n')
-                                paragraph_buffer = []
-
-                            in_list = True
-                            formatted_line = format_line_as_markdown(line)
-                            list_buffer.append(formatted_line)
-                        elif in_list:
-                            # Check if this is a continuation of the previous list item
-                            # (indented or doesn't start with list marker)
-                            if list_buffer and not is_heading_line:
-                                # Append to the last list item
-                                list_buffer[-1] += ' ' + line
-                            else:
-                                # End of list, flush it
-                                for list_item in list_buffer:
-                                    markdown_content.append(list_item + '\n')
-                                markdown_content.append('\n')
-                                list_buffer = []
-                                in_list = False
-                                # Process this line as regular text
-                                paragraph_buffer.append(line)
-                        else:
-                            # Regular text - add to paragraph buffer
-                            paragraph_buffer.append(line)
-
-                        i += 1
-
-                    # Flush remaining buffers
-                    if in_list and list_buffer:
-                        for list_item in list_buffer:
-                            markdown_content.append(list_item + '\n')
-                        markdown_content.append('\n')
-                    if paragraph_buffer:
-                        markdown_content.append(' '.join(paragraph_buffer) + '\n\n')
+                extracted = list(extracted)
+                line_counts = Counter()
+                for _, _, footer_candidates in extracted:
+                    line_counts.update(footer_candidates)
+                common_footers = frozenset(
+                    line for line, count in line_counts.items() if count > 2
+                )
+
+            for page_num, text, _ in extracted:
+                page_markdown = render_page_markdown(text, page_num, options, common_footers)
+                if page_markdown is not None:
+                    yield page_markdown
 
                     # Add page separator if requested
                     if include_page_breaks and page_num < end_page - 1:
-                        markdown_content.append('\n---\n\n')
+                        yield '\n---\n\n'
 
-            return ''.join(markdown_content)
+    except ValueError:
+        # An invalid page range; the routes answer these with a 400
+        raise
 
     except Exception as e:
         raise Exception(f"Error extracting PDF: {str(e)}")
 
 
+def extract_text_to_markdown(pdf_path, start_page, end_page, options=None, cache_dir=None, pdf=None,
+                             total_pages=None):
+    """
+    Extract text from PDF and convert to markdown format.
+
+    Takes the same arguments as iter_markdown_pages.
+
+    Returns:
+        Markdown formatted text
+    """
+    buf = io.StringIO()
+    for fragment in iter_markdown_pages(pdf_path, start_page, end_page, options, cache_dir, pdf, total_pages):
+        buf.write(fragment)
+    return buf.getvalue()
+
+
 @app.route('/')
 def index():
     """Serve the main HTML page."""
@@ -608,6 +1268,204 @@ def serve_static(path):
     return send_from_directory('frontend', path)
 
 
+def get_extract_options(form):
+    """Read the extraction and formatting options from the request form."""
+    return {
+        'use_marker': form.get('use_marker', 'false').lower() == 'true',
+        'use_pymupdf': form.get('use_pymupdf', 'false').lower() == 'true',
+        'use_markitdown': form.get('use_markitdown', 'false').lower() == 'true',
+        'use_pdfplumber': form.get('use_pdfplumber', 'false').lower() == 'true',
+        'include_page_numbers': form.get('include_page_numbers', 'true').lower() == 'true',
+        'include_page_breaks': form.get('include_page_breaks', 'true').lower() == 'true',
+        'filter_headers_footers': form.get('filter_headers_footers', 'true').lower() == 'true',
+        'preserve_formatting': form.get('preserve_formatting', 'true').lower() == 'true',
+        'workers': max(int(form.get('workers', 0)), 0),
+    }
+
+
+def get_upload():
+    """
+    Find the uploaded PDF and the parameters sent with it.
+
+    PDFs come either as the 'file' field of a multipart form, or as the raw
+    request body with Content-Type: application/pdf. A raw body skips
+    multipart parsing and is streamed to disk by save_upload; its
+    parameters are read from the query string instead of form fields.
+
+    Returns:
+        Tuple of (uploaded file, or None for a raw body; request parameters;
+        error message, or None if the upload is valid)
+    """
+    if request.mimetype == 'application/pdf':
+        return None, request.args, None
+
+    # Check if file is present
+    if 'file' not in request.files:
+        return None, request.form, 'No file provided'
+
+    file = request.files['file']
+
+    # Check if filename is empty
+    if file.filename == '':
+        return None, request.form, 'No file selected'
+
+    # Validate file type
+    if not allowed_file(file.filename):
+        return None, request.form, INVALID_FILE_TYPE
+
+    # A misnamed file is turned away by its content before it is saved
+    error = pdf_head_error(read_pdf_head(file.stream))
+    file.stream.seek(0)
+    if error:
+        return None, request.form, error
+
+    return file, request.form, None
+
+
+def read_pdf_head(stream):
+    """Read the first PDF_HEADER_SEARCH bytes of an upload stream (fewer at its end)."""
+    head = b''
+    while len(head) < PDF_HEADER_SEARCH:
+        chunk = stream.read(PDF_HEADER_SEARCH - len(head))
+        if not chunk:
+            break
+        head += chunk
+    return head
+
+
+def pdf_head_error(head):
+    """Return an error message unless head, the start of an upload, is a PDF's."""
+    if not head:
+        return 'No file provided'
+    if PDF_HEADER not in head[:PDF_HEADER_SEARCH]:
+        return INVALID_FILE_TYPE
+    return None
+
+
+def sendfile_upload(file, dst):
+    """
+    Copy a multipart upload that Werkzeug spooled to disk into dst with
+    os.sendfile, so the bytes move inside the kernel rather than through
+    Python read/write calls.
+
+    Returns:
+        True if the upload was copied; False if it should be saved normally
+        (small uploads still held in memory, or no os.sendfile support)
+    """
+    if not hasattr(os, 'sendfile') or (request.content_length or 0) <= UPLOAD_SPOOL_SIZE:
+        return False
+    try:
+        src_fd = file.stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return False
+
+    file.stream.flush()
+    size = os.fstat(src_fd).st_size
+    offset = 0
+    while offset < size:
+        try:
+            sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+        except OSError:
+            if offset:
+                raise
+            # e.g. a filesystem without sendfile support
+            return False
+        if not sent:
+            break
+        offset += sent
+
+    # Keep the file object's position in step with what was written
+    dst.seek(offset)
+    return True
+
+
+def save_upload(file):
+    """
+    Save an upload found by get_upload and return the path it was saved to.
+
+    The file gets a unique name so concurrent uploads with the same filename
+    can't clobber each other. A raw body is copied from the request stream
+    in large chunks, once its first bytes show it is a PDF; a multipart
+    upload that was spooled to disk is copied by the kernel (see
+    sendfile_upload).
+    """
+    if file is None:
+        head = read_pdf_head(request.stream)
+        error = pdf_head_error(head)
+        if error:
+            raise ValueError(error)
+
+    with tempfile.NamedTemporaryFile(dir=app.config['UPLOAD_FOLDER'], suffix='.pdf', delete=False) as tmp:
+        try:
+            if file is None:
+                tmp.write(head)
+                shutil.copyfileobj(request.stream, tmp, UPLOAD_CHUNK_SIZE)
+            elif not sendfile_upload(file, tmp):
+                file.save(tmp)
+            if tmp.tell() == 0:
+                raise ValueError('No file provided')
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+    return tmp.name
+
+
+def save_upload_bytes(pdf_data):
+    """Save an upload that read_upload kept in memory and return its path."""
+    with tempfile.NamedTemporaryFile(dir=app.config['UPLOAD_FOLDER'], suffix='.pdf', delete=False) as tmp:
+        tmp.write(pdf_data)
+    return tmp.name
+
+
+def read_upload(file, options):
+    """
+    Load an upload found by get_upload for extraction.
+
+    Small PDFs going to the PyMuPDF layout pipeline are read straight into
+    memory, since MuPDF can parse them from bytes; they only reach the disk
+    if worker processes need a path (see save_upload_bytes). Everything else
+    is saved with save_upload and memory-mapped, so hashing and pdfminer
+    read from the page cache instead of copying the file through read()
+    calls.
+
+    Returns:
+        Tuple of (path of the saved upload, or None if kept in memory;
+        the PDF's bytes, or a read-only mmap of the saved file)
+    """
+    size = request.content_length
+    in_memory = (
+        size is not None and size <= IN_MEMORY_UPLOAD_SIZE
+        and use_pymupdf_layout(options)
+        and not (options['use_marker'] or options['use_pymupdf'] or options['use_markitdown'])
+    )
+    if in_memory:
+        pdf_data = request.get_data() if file is None else file.read()
+        error = pdf_head_error(pdf_data[:PDF_HEADER_SEARCH])
+        if error:
+            raise ValueError(error)
+        return None, pdf_data
+
+    filepath = save_upload(file)
+    try:
+        with open(filepath, 'rb') as f:
+            # The map keeps its own handle on the file
+            return filepath, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except BaseException:
+        os.remove(filepath)
+        raise
+
+
+def close_upload(filepath, pdf_data, pdf=None):
+    """Close the document and data from read_upload and remove the saved upload."""
+    if pdf is not None:
+        pdf.close()
+    if isinstance(pdf_data, mmap.mmap):
+        pdf_data.close()
+    if filepath and os.path.exists(filepath):
+        os.remove(filepath)
+
+
 @app.route('/api/extract', methods=['POST'])
 def extract_pdf():
     """
@@ -617,56 +1475,59 @@ def extract_pdf():
         - file: PDF file
         - start_page: Starting page number (optional, default: 1)
         - end_page: Ending page number (optional, default: last page)
+        - use_marker: Use the Marker ML pipeline instead of the PyMuPDF layout
+          extraction (optional, default: false; much slower)
         - include_page_numbers: Include page headers (optional, default: true)
         - include_page_breaks: Include page separators (optional, default: true)
         - filter_headers_footers: Filter repeated headers/footers (optional, default: true)
         - preserve_formatting: Preserve text formatting (optional, default: true)
-    """
-    # Check if file is present
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file provided'}), 400
+        - force_refresh: Ignore and rebuild the cached extraction (optional, default: false)
+        - workers: Maximum worker processes for page extraction, 1 for serial
+          (optional, default: 0 = one per CPU with pdfplumber, serial with PyMuPDF)
 
-    file = request.files['file']
+    The PDF may instead be sent as a raw application/pdf body, with the
+    other fields in the query string (see get_upload).
+    """
+    file, params, error = get_upload()
+    if error:
+        return jsonify({'error': error}), 400
 
-    # Check if filename is empty
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+    filepath = pdf_data = None
+    try:
+        # Get page range from request
+        start_page = int(params.get('start_page', 1))
 
-    # Validate file type
-    if not allowed_file(file.filename):
-        return jsonify({'error': 'Invalid file type. Only PDF files are allowed.'}), 400
+        # Get formatting options
+        options = get_extract_options(params)
 
-    try:
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # Save the upload, or keep a small one in memory
+        filepath, pdf_data = read_upload(file, options)
 
-        # Get page range from request
-        start_page = int(request.form.get('start_page', 1))
+        # Look up previous extractions of the same document by content hash
+        cache_dir = document_cache_dir(pdf_data)
+        if params.get('force_refresh', 'false').lower() == 'true':
+            shutil.rmtree(cache_dir, ignore_errors=True)
 
-        # Get total pages to set default end_page
-        with pdfplumber.open(filepath) as pdf:
-            total_pages = len(pdf.pages)
+        # Open the PDF once: the same document gives the page count and
+        # feeds the extraction
+        with open_layout_pdf(filepath, options, stream=pdf_data) as pdf:
+            # Get total pages to set default end_page
+            meta = load_cache_meta(cache_dir)
+            if meta:
+                total_pages = meta['total_pages']
+            else:
+                total_pages = page_count(pdf)
+                save_cache_meta(cache_dir, {'total_pages': total_pages})
 
-        end_page = int(request.form.get('end_page', total_pages))
+            end_page = int(params.get('end_page', total_pages))
 
-        # Get formatting options
-        options = {
-            'use_marker': request.form.get('use_marker', 'true').lower() == 'true',
-            'use_pymupdf': request.form.get('use_pymupdf', 'false').lower() == 'true',
-            'use_markitdown': request.form.get('use_markitdown', 'false').lower() == 'true',
-            'include_page_numbers': request.form.get('include_page_numbers', 'true').lower() == 'true',
-            'include_page_breaks': request.form.get('include_page_breaks', 'true').lower() == 'true',
-            'filter_headers_footers': request.form.get('filter_headers_footers', 'true').lower() == 'true',
-            'preserve_formatting': request.form.get('preserve_formatting', 'true').lower() == 'true',
-        }
-
-        # Extract and convert to markdown
-        markdown_text = extract_text_to_markdown(filepath, start_page, end_page, options)
+            # Worker processes open the PDF by path
+            if filepath is None and extraction_workers(options, end_page - start_page + 1) > 1:
+                filepath = save_upload_bytes(pdf_data)
 
-        # Clean up uploaded file
-        os.remove(filepath)
+            # Extract and convert to markdown
+            markdown_text = extract_text_to_markdown(filepath, start_page, end_page, options, cache_dir, pdf,
+                                                     total_pages)
 
         return jsonify({
             'success': True,
@@ -675,18 +1536,89 @@ def extract_pdf():
             'total_pages': total_pages
         })
 
+    except HTTPException:
+        # e.g. a raw body over MAX_FILE_SIZE; let the error handlers answer
+        raise
+
     except ValueError as e:
-        # Clean up file if it exists
-        if os.path.exists(filepath):
-            os.remove(filepath)
         return jsonify({'error': str(e)}), 400
 
     except Exception as e:
-        # Clean up file if it exists
-        if os.path.exists(filepath):
-            os.remove(filepath)
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
+    finally:
+        # Clean up uploaded file
+        close_upload(filepath, pdf_data)
+
+
+@app.route('/api/extract_stream', methods=['POST'])
+def extract_pdf_stream():
+    """
+    API endpoint to extract text from PDF and stream it back as markdown.
+
+    Takes the same form data as /api/extract. The response body is
+    text/markdown sent page by page as pages are converted; the total page
+    count is in the X-Total-Pages header. Errors found before streaming
+    starts are returned as JSON, like /api/extract. Later errors can no
+    longer change the status, so the body is ended with STREAM_ERROR_MARKER
+    followed by the error message.
+    """
+    file, params, error = get_upload()
+    if error:
+        return jsonify({'error': error}), 400
+
+    filepath = pdf_data = pdf = None
+    try:
+        start_page = int(params.get('start_page', 1))
+        options = get_extract_options(params)
+
+        # The document stays open (and mapped) until the stream finishes
+        filepath, pdf_data = read_upload(file, options)
+        cache_dir = document_cache_dir(pdf_data)
+        if params.get('force_refresh', 'false').lower() == 'true':
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+        pdf = open_layout_pdf(filepath, options, stream=pdf_data)
+        meta = load_cache_meta(cache_dir)
+        if meta:
+            total_pages = meta['total_pages']
+        else:
+            total_pages = page_count(pdf)
+            save_cache_meta(cache_dir, {'total_pages': total_pages})
+
+        end_page = int(params.get('end_page', total_pages))
+
+        # Validate the page range up front; once streaming starts the
+        # status code can no longer change
+        if start_page < 1 or end_page > total_pages or start_page > end_page:
+            raise ValueError(f"Invalid page range. PDF has {total_pages} pages.")
+
+        # Worker processes open the PDF by path
+        if filepath is None and extraction_workers(options, end_page - start_page + 1) > 1:
+            filepath = save_upload_bytes(pdf_data)
+
+    except Exception as e:
+        close_upload(filepath, pdf_data, pdf)
+        if isinstance(e, HTTPException):
+            raise
+        if isinstance(e, ValueError):
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+
+    def generate():
+        try:
+            yield from iter_markdown_pages(filepath, start_page, end_page, options, cache_dir, pdf, total_pages)
+        except Exception as e:
+            print(f"Streamed extraction failed: {e}")
+            yield f"{STREAM_ERROR_MARKER}An error occurred: {str(e)}"
+        finally:
+            close_upload(filepath, pdf_data, pdf)
+
+    response = Response(stream_with_context(generate()), mimetype='text/markdown')
+    response.headers['X-Total-Pages'] = str(total_pages)
+    response.headers['X-Pages-Extracted'] = f"{start_page}-{end_page}"
+    return response
+
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -3,6 +3,10 @@ let selectedFile = null;
 let totalPages = 0;
 let extractedMarkdown = '';
 
+// Starts the error message the server appends when a streamed extraction
+// fails part way through (see /api/extract_stream)
+const STREAM_ERROR_MARKER = '\0ERROR: ';
+
 // DOM elements
 const pdfFileInput = document.getElementById('pdfFile');
 const uploadBox = document.getElementById('uploadBox');
@@ -142,31 +146,66 @@ async function handleExtract() {
     const filterHeadersFooters = document.getElementById('filterHeadersFooters').checked;
     const preserveFormatting = document.getElementById('preserveFormatting').checked;
 
-    const formData = new FormData();
-    formData.append('file', selectedFile);
-    formData.append('start_page', startPage);
-    formData.append('end_page', endPage);
-    formData.append('use_marker', useMarker);
-    formData.append('include_page_numbers', includePageNumbers);
-    formData.append('include_page_breaks', includePageBreaks);
-    formData.append('filter_headers_footers', filterHeadersFooters);
-    formData.append('preserve_formatting', preserveFormatting);
+    // Send the PDF as the raw request body (no multipart encoding) with
+    // the options in the query string
+    const params = new URLSearchParams({
+        start_page: startPage,
+        end_page: endPage,
+        use_marker: useMarker,
+        include_page_numbers: includePageNumbers,
+        include_page_breaks: includePageBreaks,
+        filter_headers_footers: filterHeadersFooters,
+        preserve_formatting: preserveFormatting
+    });
 
     try {
-        const response = await fetch('/api/extract', {
+        const response = await fetch(`/api/extract_stream?${params}`, {
             method: 'POST',
-            body: formData
+            headers: { 'Content-Type': 'application/pdf' },
+            body: selectedFile
         });
 
-        const data = await response.json();
+        if (!response.ok) {
+            const data = await response.json();
+            hideLoading();
+            showError(data.error || 'An error occurred during extraction');
+            return;
+        }
 
+        // Show pages as they arrive instead of waiting for the whole document
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        extractedMarkdown = '';
         hideLoading();
+        resultSection.style.display = 'block';
+        switchTab('markdown');
+
+        // The 200 status is sent before any page is converted, so failures
+        // after that point can only show up in (or cut off) the body
+        let streamError = null;
+        try {
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                extractedMarkdown += decoder.decode(value, { stream: true });
+                markdownOutput.textContent = extractedMarkdown;
+            }
+            extractedMarkdown += decoder.decode();
+        } catch (error) {
+            streamError = 'The connection was lost during extraction; the result is incomplete.';
+            console.error('Stream error:', error);
+        }
 
-        if (response.ok && data.success) {
-            extractedMarkdown = data.markdown;
-            displayResults(data);
-        } else {
-            showError(data.error || 'An error occurred during extraction');
+        const markerIndex = extractedMarkdown.indexOf(STREAM_ERROR_MARKER);
+        if (markerIndex !== -1) {
+            const message = extractedMarkdown.slice(markerIndex + STREAM_ERROR_MARKER.length);
+            streamError = `${message} The result is incomplete.`;
+            extractedMarkdown = extractedMarkdown.slice(0, markerIndex);
+        }
+
+        displayResults({ markdown: extractedMarkdown });
+        if (streamError) {
+            showError(streamError);
         }
     } catch (error) {
         hideLoading();
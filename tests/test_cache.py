@@ -0,0 +1,86 @@
+"""
+Regression tests for the on-disk page cache under concurrent requests.
+
+app.run serves requests on threads, so cache writes for one document can
+race each other and prune_cache within a single process.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+
+THREADS = 4
+WRITES = 200
+
+
+def run_threads(target, count=THREADS):
+    """Run target(index) on count threads at once; return the exceptions raised."""
+    errors = []
+    start = threading.Barrier(count)
+
+    def run(index):
+        start.wait()
+        try:
+            target(index)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class ConcurrentCacheWriteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+
+    def test_threads_writing_the_same_entry(self):
+        def write_meta(index):
+            for _ in range(WRITES):
+                app.save_cache_meta(self.cache_dir, {'total_pages': index})
+
+        self.assertEqual(run_threads(write_meta), [])
+        self.assertIn(app.load_cache_meta(self.cache_dir)['total_pages'], range(THREADS))
+        self.assertEqual(os.listdir(self.cache_dir), ['meta.json'])
+
+    def test_cache_removed_while_pages_are_written(self):
+        # One thread plays prune_cache, removing the document's directory
+        # while the others are still filling it
+        def fill_or_prune(index):
+            for page_num in range(WRITES):
+                if index == 0:
+                    shutil.rmtree(self.cache_dir, ignore_errors=True)
+                else:
+                    text = app.cached_page_text(None, f'page_{page_num}.txt', lambda page: 'text', self.cache_dir)
+                    self.assertEqual(text, 'text')
+
+        self.assertEqual(run_threads(fill_or_prune), [])
+
+    def test_unwritable_cache_does_not_fail_extraction(self):
+        blocked = os.path.join(self.cache_dir, 'document')
+        with open(blocked, 'w', encoding='utf-8') as f:
+            f.write('not a directory')
+
+        text = app.cached_page_text(None, 'page_1.txt', lambda page: 'text', blocked)
+        self.assertEqual(text, 'text')
+        app.save_cache_meta(blocked, {'total_pages': 1})
+        with open(blocked, encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'not a directory')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Regression tests for column detection in layout_words_to_text.
+
+The pages are built from word boxes directly, the way PyMuPDF and
+pdfplumber report them, so no PDF files are needed.
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+
+PAGE_WIDTH = 612
+CHAR_WIDTH = 6.0  # Advance of 10pt Courier
+LINE_HEIGHT = 12.0
+
+
+def monospace_words(lines, left=72.0, top=72.0):
+    """Lay lines out in a fixed-width font, one word box per word."""
+    words = []
+    for row, line in enumerate(lines):
+        column = 0
+        for text in line.split(' '):
+            if text:
+                x0 = left + column * CHAR_WIDTH
+                words.append({'x0': x0, 'x1': x0 + len(text) * CHAR_WIDTH,
+                              'top': top + row * LINE_HEIGHT, 'text': text})
+            column += len(text) + 1
+    return words
+
+
+def column_words(lines, left, top, nudge=()):
+    """Lay lines out from left, each shifted by the matching nudge, if any."""
+    words = []
+    for row, line in enumerate(lines):
+        x = left + (nudge[row] if row < len(nudge) else 0)
+        for text in line.split():
+            width = len(text) * 5.0
+            words.append({'x0': x, 'x1': x + width, 'top': top + row * LINE_HEIGHT, 'text': text})
+            x += width + 3.0
+    return words
+
+
+def license_lines():
+    with open(os.path.join(ROOT, 'LICENSE'), encoding='utf-8') as f:
+        return f.read().split('\n')
+
+
+LEFT_COLUMN = [
+    'Lorem ipsum dolor sit amet, consectetur',
+    'adipiscing elit, sed do eiusmod tempor',
+    'incididunt ut labore et dolore magna',
+    'aliqua. Ut enim ad minim veniam, quis',
+    'nostrud exercitation ullamco laboris',
+    'nisi ut aliquip ex ea commodo consequat.',
+]
+
+RIGHT_COLUMN = [
+    'Duis aute irure dolor in reprehenderit',
+    'in voluptate velit esse cillum dolore',
+    'eu fugiat nulla pariatur. Excepteur',
+    'sint occaecat cupidatat non proident,',
+    'sunt in culpa qui officia deserunt',
+    'mollit anim id est laborum.',
+]
+
+
+class SingleColumnTest(unittest.TestCase):
+    """Plain prose must be read line by line, never split into columns."""
+
+    def assert_reads_in_order(self, lines):
+        words = monospace_words(lines)
+        text = app.layout_words_to_text(words, PAGE_WIDTH)
+        self.assertEqual(text, '\n'.join(' '.join(line.split()) for line in lines if line.strip()))
+
+    def test_full_pages_of_prose(self):
+        lines = license_lines()
+        for start in range(0, 330, 55):
+            with self.subTest(start=start):
+                self.assert_reads_in_order(lines[start:start + 55])
+
+    def test_short_page_of_prose(self):
+        self.assert_reads_in_order(license_lines()[8:13])
+
+
+class TwoColumnTest(unittest.TestCase):
+    """Columns are read one after the other, whole lines at a time."""
+
+    def test_columns_read_in_order(self):
+        words = column_words(LEFT_COLUMN, 50, 90) + column_words(RIGHT_COLUMN, 320, 90)
+        text = app.layout_words_to_text(words, PAGE_WIDTH)
+        self.assertEqual(text, '\n'.join(LEFT_COLUMN + RIGHT_COLUMN))
+
+    def test_margin_wobbling_below_the_column_start(self):
+        # A right column line starting a fraction of a point early must not
+        # be glued onto the left column line beside it
+        nudge = (0.0, -0.3, 0.0, 0.4, -0.2, 0.0)
+        words = column_words(LEFT_COLUMN, 50, 90) + column_words(RIGHT_COLUMN, 320, 90, nudge)
+        text = app.layout_words_to_text(words, PAGE_WIDTH)
+        self.assertEqual(text, '\n'.join(LEFT_COLUMN + RIGHT_COLUMN))
+
+    def test_lines_crossing_the_gutter_stay_whole(self):
+        heading = 'THE DUNGEON GUIDE'
+        title = 'A Centered Title That Crosses The Column Gutter Here'
+        words = (
+            column_words([heading], 260, 40)
+            + column_words([title], 150, 60)
+            + column_words(LEFT_COLUMN, 50, 90)
+            + column_words(RIGHT_COLUMN, 320, 90)
+        )
+        text = app.layout_words_to_text(words, PAGE_WIDTH)
+        self.assertEqual(text, '\n'.join([heading, title] + LEFT_COLUMN + RIGHT_COLUMN))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+Regression tests for page ranges on PDFs whose page tree overstates /Count.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+
+
+def pdf_bytes(pages, count):
+    """Build a PDF with `pages` blank pages whose page tree claims `count`."""
+    kids = b' '.join(b'%d 0 R' % (3 + i) for i in range(pages))
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, count),
+    ] + [b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>'] * pages
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+class OverstatedPageCountTest(unittest.TestCase):
+
+    def setUp(self):
+        cache_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_folder, ignore_errors=True)
+        app.app.config['CACHE_FOLDER'] = cache_folder
+        self.addCleanup(app.app.config.__setitem__, 'CACHE_FOLDER', app.CACHE_FOLDER)
+        self.client = app.app.test_client()
+
+    def extract(self, query):
+        return self.client.post(f'/api/extract?{query}', data=pdf_bytes(pages=3, count=5),
+                                content_type='application/pdf')
+
+    def test_missing_pages_are_an_invalid_range(self):
+        for backend in ('true', 'false'):
+            with self.subTest(use_pdfplumber=backend):
+                response = self.extract(f'use_pdfplumber={backend}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Invalid page range', response.get_json()['error'])
+
+    def test_pages_that_exist_are_extracted(self):
+        response = self.extract('use_pdfplumber=true&end_page=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['pages_extracted'], '1-3')
+
+
+if __name__ == '__main__':
+    unittest.main()